@@ -7,10 +7,10 @@ including token tracking and budget management.
 
 from typing import Dict, Any, Optional, List, Union
 from .key_manager import KeyManager
-import json
+from .utils import _SessionMixin, _json_dumps, _json_loads
 
 
-class AiService:
+class AiService(_SessionMixin):
     """
     A generic class for AI services across different providers.
     
@@ -82,16 +82,13 @@ class AiService:
         Returns:
             True if valid, False otherwise
         """
-        # Check available services
-        services = self.keys.available_services()
-        
-        # Check if service exists
-        if self.service_supplier not in services:
+        # Check the service exists, validating only this service's key
+        service_info = self.keys.get_service_info(self.service_supplier)
+        if service_info is None:
             print(f"Service '{self.service_supplier}' not found in available services")
             return False
             
         # Check if service is valid
-        service_info = services[self.service_supplier]
         if not service_info.get('valid'):
             print(f"Service '{self.service_supplier}' has an invalid API key")
             return False
@@ -111,6 +108,28 @@ class AiService:
             
         return True
     
+    def set_model(self, model: str) -> bool:
+        """
+        Switch the default model used by this service.
+        
+        This reuses the existing service (key, budget and token counts) instead
+        of creating a new AiService for every model change.
+        
+        Args:
+            model: Model name to use (must be available in the service)
+            
+        Returns:
+            True if the model was switched, False otherwise
+        """
+        service_info = self.keys.get_service_info(self.service_supplier) or {}
+        models = service_info.get('models', [])
+        if models and model not in models:
+            print(f"Model '{model}' not found in available models for '{self.service_supplier}'")
+            return False
+            
+        self.model = model
+        return True
+    
     def add_tokens_in(self, num: int) -> None:
         """
         Add to the input token count and update budget.
@@ -293,13 +312,16 @@ class AiService:
         url = f"{self.base_url}{endpoint}"
         
         try:
+            # Serialize once; headers already declare the JSON content type
+            body = _json_dumps(data)
+            
             # Debug
             if self.service_supplier == "anthropic":
                 print(f"Making Anthropic API request to: {url}")
                 print(f"With model: {model_to_use}")
-                print(f"Request payload: {json.dumps(data)[:200]}...")
+                print(f"Request payload: {body[:200].decode('utf-8', 'replace')}...")
                 
-            response = requests.post(url, json=data, headers=headers)
+            response = self._get_session().post(url, data=body, headers=headers)
             
             # Debug
             if self.service_supplier == "anthropic":
@@ -328,7 +350,7 @@ class AiService:
             # For other status codes, raise the standard exception
             response.raise_for_status()
             
-            result = response.json()
+            result = _json_loads(response.content)
             
             # Update token usage if available in response
             if "usage" in result:
@@ -5,12 +5,11 @@ This module provides a simplified interface for conversational AI interactions
 using various AI services.
 """
 
-import json
 import time
 from typing import Dict, Any, Optional, List, Union, Callable
-import requests
 from .ai_service import AiService
 from .streaming import StreamProcessor
+from .utils import _json_dumps, _json_loads
 
 
 class Chat:
@@ -25,7 +24,8 @@ class Chat:
     def __init__(
         self,
         service,
-        system_message: str = "You are a helpful, concise assistant."
+        system_message: str = "You are a helpful, concise assistant.",
+        max_turns: Optional[int] = None
     ):
         """
         Initialize a chat instance with an AI service.
@@ -33,9 +33,15 @@ class Chat:
         Args:
             service: An AiService instance
             system_message: System message to set the behavior of the assistant
+            max_turns: Optional number of previous question/answer exchanges to
+                send with each question (defaults to the whole conversation)
         """
+        if max_turns is not None and max_turns < 0:
+            raise ValueError(f"max_turns must be zero or more, got {max_turns}")
+            
         self.service = service
         self.system_message = system_message
+        self.max_turns = max_turns
         self.conversation_history = []
         
         # Add system message if provided
@@ -85,6 +91,7 @@ class Chat:
             "role": "user",
             "content": question
         })
+        self._trim_history()
         
         # Record the start time
         start_time = time.time()
@@ -115,7 +122,7 @@ class Chat:
             "tokens_in": tokens_in,
             "tokens_out": tokens_out,
             "service": self.service.service_supplier,
-            "model": self.service.model,
+            "model": model or self.service.model,
             "timestamp": time.time()
         }
         
@@ -163,8 +170,8 @@ class Chat:
         """
         Ask a question and stream the response.
         
-        NOTE: This feature is partially implemented. Currently, it only works as a fallback 
-        to non-streaming for most services. Full streaming is planned for a future release.
+        NOTE: Streaming is currently only implemented for OpenAI and Anthropic.
+        Other services fall back to a regular, non-streaming request.
         
         Args:
             question: The question to ask
@@ -178,8 +185,8 @@ class Chat:
             The complete response as a string
         """
         # Currently only implemented for specific services
-        if self.service.service_supplier not in ["openai"]:
-            print("Warning: Streaming is only supported for OpenAI services")
+        if self.service.service_supplier not in ["openai", "anthropic"]:
+            print("Warning: Streaming is only supported for OpenAI and Anthropic services")
             print("Falling back to non-streaming request")
             return self.ask_question(
                 question, model, temperature, max_tokens, clear_history
@@ -194,6 +201,7 @@ class Chat:
             "role": "user",
             "content": question
         })
+        self._trim_history()
         
         # Record start time for timing information
         start_time = time.time()
@@ -206,6 +214,8 @@ class Chat:
         response = ""
         if self.service.service_supplier == "openai":
             response = self._stream_openai(model, temperature, max_tokens, chunk_handler)
+        elif self.service.service_supplier == "anthropic":
+            response = self._stream_anthropic(model, temperature, max_tokens, chunk_handler)
         
         # Calculate time taken 
         time_taken = time.time() - start_time
@@ -220,7 +230,7 @@ class Chat:
             "tokens_in": tokens_in,
             "tokens_out": tokens_out,
             "service": self.service.service_supplier,
-            "model": self.service.model,
+            "model": model or self.service.model,
             "timestamp": time.time()
         }
         
@@ -321,8 +331,50 @@ class Chat:
         """
         Stream a response from OpenAI.
         
-        NOTE: This method is currently not implemented. The framework is in place
-        for future development, but throws NotImplementedError when called.
+        Args:
+            model: Optional model to use
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            chunk_handler: Optional function to handle each chunk
+            
+        Returns:
+            The complete streamed response
+        """
+        # Check if the service is available
+        if not self.service or not self.service.is_available():
+            raise ValueError("No available service. Please initialize a valid service.")
+            
+        data = {
+            "model": model or self.service.model,
+            "messages": self.conversation_history,
+            "temperature": temperature,
+            "stream": True
+        }
+        if max_tokens is not None:
+            data["max_tokens"] = max_tokens
+            
+        headers = {
+            "Authorization": f"Bearer {self.service.api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        return self._stream_request(
+            f"{self.service.base_url}/chat/completions",
+            data,
+            headers,
+            StreamProcessor.process_openai_stream,
+            chunk_handler
+        )
+    
+    def _stream_anthropic(
+        self,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = 1000,
+        chunk_handler: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """
+        Stream a response from Anthropic's Messages API.
         
         Args:
             model: Optional model to use
@@ -333,8 +385,103 @@ class Chat:
         Returns:
             The complete streamed response
         """
-        # TODO: Implement streaming for OpenAI in a future release
-        raise NotImplementedError("Streaming not yet implemented")
+        # Check if the service is available
+        if not self.service or not self.service.is_available():
+            raise ValueError("No available service. Please initialize a valid service.")
+            
+        # Anthropic takes the system message separately from the conversation
+        system_message = None
+        messages = []
+        for msg in self.conversation_history:
+            if msg["role"] == "system":
+                system_message = msg["content"]
+            elif msg["role"] in ["user", "assistant"]:
+                messages.append(msg)
+                
+        data = {
+            "model": model or self.service.model,
+            "messages": messages,
+            "max_tokens": max_tokens if max_tokens else 1000,
+            "temperature": temperature,
+            "stream": True
+        }
+        if system_message:
+            data["system"] = system_message
+            
+        headers = {
+            "x-api-key": self.service.api_key,
+            "anthropic-version": "2023-06-01",
+            "Content-Type": "application/json"
+        }
+        
+        return self._stream_request(
+            f"{self.service.base_url}/messages",
+            data,
+            headers,
+            StreamProcessor.process_anthropic_stream,
+            chunk_handler
+        )
+    
+    def _stream_request(
+        self,
+        url: str,
+        data: Dict[str, Any],
+        headers: Dict[str, str],
+        process_stream: Callable[..., str],
+        chunk_handler: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """
+        Send a streaming request and process the server-sent events.
+        
+        The response body is read in large blocks and split into event
+        lines by StreamProcessor, rather than read line by line.
+        
+        Args:
+            url: Endpoint URL
+            data: Request payload
+            headers: Request headers
+            process_stream: StreamProcessor method for the service's event format
+            chunk_handler: Optional function to handle each chunk
+            
+        Returns:
+            The complete streamed response
+        """
+        # Go through the service's session so streamed and regular requests
+        # share its pooled keep-alive connections, and encode the body the
+        # same way as AiService.chat_completion
+        response = self.service._get_session().post(
+            url, data=_json_dumps(data), headers=headers, stream=True
+        )
+        try:
+            response.raise_for_status()
+            return process_stream(
+                StreamProcessor.iter_lines(response.iter_content(chunk_size=64 * 1024)),
+                chunk_handler
+            )
+        finally:
+            response.close()
+    
+    def _trim_history(self) -> None:
+        """
+        Drop the oldest exchanges so at most max_turns of them precede the
+        latest question. The system message is always kept, and the kept
+        messages always start with a user message.
+        """
+        if self.max_turns is None:
+            return
+            
+        history = self.conversation_history
+        start = 1 if history and history[0]["role"] == "system" else 0
+        excess = len(history) - start - (self.max_turns * 2 + 1)
+        if excess <= 0:
+            return
+            
+        # Unanswered questions (e.g. from a failed request) break the
+        # question/answer pairing, so also drop any assistant messages left
+        # at the front; services like Anthropic reject such histories
+        while history[start + excess]["role"] != "user":
+            excess += 1
+        del history[start:start + excess]
     
     def clear_history(self):
         """
@@ -404,12 +551,14 @@ class Chat:
         """
         Save the chat history and settings to a file.
         
+        The file is written as newline-delimited JSON: the first line holds the
+        chat settings and every following line holds one message.
+        
         Args:
             file_path: Path to the file where chat should be saved
         """
-        # Create a dictionary with all the chat information
-        chat_data = {
-            "conversation_history": self.conversation_history,
+        # The first line carries everything except the messages
+        meta = {
             "system_message": self.system_message,
             "service_info": {
                 "supplier": self.service.service_supplier,
@@ -418,9 +567,11 @@ class Chat:
             "last_request_info": self.last_request_info
         }
         
-        # Save to file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(chat_data, f, indent=2, ensure_ascii=False)
+        # Save to file, one JSON document per line, in a single write
+        lines = [_json_dumps({"meta": meta})]
+        lines.extend(_json_dumps(message) for message in self.conversation_history)
+        with open(file_path, 'wb') as f:
+            f.write(b"\n".join(lines) + b"\n")
             
         print(f"Chat saved to {file_path}")
         
@@ -433,8 +584,22 @@ class Chat:
             key_manager: Optional KeyManager instance to create new service
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                chat_data = json.load(f)
+            with open(file_path, 'rb') as f:
+                first_line = f.readline()
+                try:
+                    header = _json_loads(first_line)
+                except ValueError:
+                    header = None
+                    
+                if isinstance(header, dict) and "meta" in header:
+                    # Newline-delimited format written by save_chat
+                    chat_data = dict(header["meta"])
+                    chat_data["conversation_history"] = [
+                        _json_loads(line) for line in f if line.strip()
+                    ]
+                else:
+                    # Older chat files hold a single (pretty-printed) JSON document
+                    chat_data = _json_loads(first_line + f.read())
                 
             # Load conversation history
             if "conversation_history" in chat_data:
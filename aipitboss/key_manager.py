@@ -8,12 +8,132 @@ It also validates keys and tracks available services and models.
 
 import os
 import json
-import requests
-from pathlib import Path
-from typing import Dict, Optional, Any, Union, List, Tuple, Set
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Optional, Any, Union, List, Tuple, Set, Mapping
+from .utils import _SessionMixin, _json_dumps, _json_loads
 
 
-class KeyManager:
+@lru_cache(maxsize=16)
+def _parse_keys_file(path: str, mtime_ns: int, size: int, inode: int) -> Mapping[str, Any]:
+    """
+    Parse a keys file. Results are cached per (path, mtime, size, inode).
+    
+    Args:
+        path: Absolute path to the JSON keys file
+        mtime_ns: Modification time of the file, used to invalidate the cache
+        size: Size of the file, used to invalidate the cache
+        inode: Inode of the file, so a file atomically replaced within the
+            mtime granularity is not mistaken for the cached one
+        
+    Returns:
+        Read-only mapping of the parsed keys
+    """
+    with open(path, 'rb') as f:
+        keys = _json_loads(f.read())
+    if not isinstance(keys, dict):
+        keys = {}
+    return MappingProxyType(keys)
+
+
+def _read_keys_file(path: str) -> Mapping[str, Any]:
+    """
+    Read a keys file, reusing the parsed result while the file is unchanged.
+    
+    Args:
+        path: Path to the JSON keys file
+        
+    Returns:
+        Read-only mapping of the parsed keys
+        
+    Raises:
+        FileNotFoundError: If the file does not exist
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    return _parse_keys_file(path, st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _write_keys_file(path: str, keys: Dict[str, Any]) -> None:
+    """
+    Atomically write keys to a JSON keys file.
+    
+    The keys are written to a temporary file next to the target which then
+    replaces it, so a crash mid-write never leaves a truncated keys file.
+    Symlinks are followed, and an existing file keeps its permissions; a new
+    file is only readable by its owner.
+    
+    Args:
+        path: Path to the JSON keys file
+        keys: Keys to write
+    """
+    # Write next to the real file so a symlinked keys file stays a symlink
+    real_path = os.path.realpath(path)
+    directory = os.path.dirname(real_path)
+    os.makedirs(directory, exist_ok=True)
+    
+    # A unique temporary file (created with mode 0o600) per writer
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(real_path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_json_dumps(keys, indent=True))
+        try:
+            shutil.copymode(real_path, tmp_path)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, real_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    finally:
+        # Rewrites can land within the same mtime tick, so drop cached parses
+        _parse_keys_file.cache_clear()
+
+
+@lru_cache(maxsize=32)
+def _key_names(service: str) -> Tuple[str, ...]:
+    """
+    Get the names a service's key may be stored under in a keys file.
+    
+    Args:
+        service: Service name
+        
+    Returns:
+        Tuple of key names in priority order
+    """
+    service_caps = service.upper()
+    return (service, f"{service}_api_key", service_caps, f"{service_caps}_API_KEY")
+
+
+def _new_info(key: str, source: str) -> Dict[str, Any]:
+    """
+    Create the services_info entry for a newly loaded key.
+    
+    Args:
+        key: API key for the service
+        source: Where the key came from ("environment" or "file")
+        
+    Returns:
+        Dictionary with the key, its source and empty validation results
+    """
+    return {
+        "api_key": key,
+        "source": source,
+        "valid": None,  # Will be set during validation
+        "models": []    # Will be populated during validation
+    }
+
+
+class KeyManager(_SessionMixin):
     """
     A class to manage API keys for different services.
     
@@ -23,7 +143,7 @@ class KeyManager:
     """
     
     # Default keys file location (in user's home directory)
-    DEFAULT_KEYS_FILE = os.path.join(str(Path.home()), ".aipitboss_keys.json")
+    DEFAULT_KEYS_FILE = os.path.join(os.path.expanduser("~"), ".aipitboss_keys.json")
     
     # Default keys file in the current directory
     LOCAL_KEYS_FILE = os.path.join(os.getcwd(), ".keys.json")
@@ -61,7 +181,9 @@ class KeyManager:
         This will:
         1. Check environment variables for API keys
         2. Check keys file for API keys
-        3. Validate keys and identify available services and models
+        
+        Keys are validated lazily: the test requests for a service are only
+        made when its key or the list of available services is first requested.
         
         Args:
             keys_file: Optional path to a keys file
@@ -72,43 +194,71 @@ class KeyManager:
         self.use_env = use_env
         
         # Find keys file in current or parent directory if not specified
-        if self.keys_file == self.LOCAL_KEYS_FILE and not Path(self.keys_file).exists():
-            parent_dir_keys = os.path.join(os.path.dirname(os.getcwd()), ".keys.json")
-            if Path(parent_dir_keys).exists():
+        if self.keys_file == self.LOCAL_KEYS_FILE and not os.path.exists(self.keys_file):
+            # The parent path is only built when the local file is missing
+            parent_dir_keys = os.path.join(
+                os.path.dirname(os.path.dirname(self.LOCAL_KEYS_FILE)), ".keys.json"
+            )
+            if os.path.exists(parent_dir_keys):
                 self.keys_file = parent_dir_keys
         
         # Dictionary to store information about each service
         self.services_info = {}
         
+        # Keys added with add_key that save() has not written to the file yet
+        self._pending_file_keys: Dict[str, str] = {}
+        
         # Load all available keys
         self._load_all_keys()
         
-        # Validate keys if requested
-        if validate_keys:
-            self._validate_keys()
+        # Services whose keys still need validating on first access
+        self._pending_validation = set(self.services_info) if validate_keys else set()
+    
+    def __enter__(self) -> "KeyManager":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # Write any keys added with flush=False in one go, unless the block
+        # failed part way through
+        if exc_type is None and self._pending_file_keys:
+            self.save()
+        self.close()
+    
+    @classmethod
+    def _env_var_name(cls, service: str) -> str:
+        """
+        Get the environment variable name used for a service's API key.
+        
+        Args:
+            service: Service name (e.g., "openai", "anthropic")
+            
+        Returns:
+            Environment variable name (e.g., "OPENAI_API_KEY")
+        """
+        env_var = cls.ENV_PREFIXES.get(service)
+        if env_var is None:
+            # Only services without a known variable need a name built
+            env_var = f"{service.upper()}_API_KEY"
+        return env_var
     
     def _load_all_keys(self) -> None:
         """
         Load all available keys from environment variables and keys file.
         """
+        services_info = self.services_info
+        
         # First check environment variables
         if self.use_env:
+            getenv = os.environ.get
             for service, env_var in self.ENV_PREFIXES.items():
-                key = os.environ.get(env_var)
-                if key:
-                    if service not in self.services_info:
-                        self.services_info[service] = {
-                            "api_key": key,
-                            "source": "environment",
-                            "valid": None,  # Will be set during validation
-                            "models": []    # Will be populated during validation
-                        }
-        
-        # Then check keys file
-        if self.keys_file and Path(self.keys_file).exists():
+                key = getenv(env_var)
+                if key and service not in services_info:
+                    services_info[service] = _new_info(key, "environment")
+        
+        # Then check keys file (a missing file is handled below)
+        if self.keys_file:
             try:
-                with open(self.keys_file, 'r') as f:
-                    keys = json.load(f)
+                keys = _read_keys_file(self.keys_file)
                 
                 # Add keys from file if not already loaded from environment
                 for service, key in keys.items():
@@ -116,70 +266,126 @@ class KeyManager:
                     if service.startswith("_") or service == "comment":
                         continue
                         
-                    if service not in self.services_info and key:
-                        self.services_info[service] = {
-                            "api_key": key,
-                            "source": "file",
-                            "valid": None,  # Will be set during validation
-                            "models": []    # Will be populated during validation
-                        }
+                    if service not in services_info and key:
+                        services_info[service] = _new_info(key, "file")
             except (json.JSONDecodeError, FileNotFoundError):
                 pass
     
-    def _validate_keys(self) -> None:
+    def validate_all(self) -> None:
+        """
+        Validate all API keys now instead of on first access.
+        """
+        self._validate_keys()
+    
+    def _ensure_validated(self, services: Optional[List[str]] = None) -> None:
+        """
+        Validate services that are still pending lazy validation.
+        
+        Args:
+            services: Optional list of services to check (defaults to all)
+        """
+        if not self._pending_validation:
+            return
+        if services is None:
+            pending = list(self._pending_validation)
+        else:
+            pending = [s for s in services if s in self._pending_validation]
+        if pending:
+            self._validate_keys(pending)
+    
+    def _validate_keys(self, services: Optional[List[str]] = None) -> None:
         """
         Validate API keys by making test requests and update services_info.
+        
+        The test requests for different services are independent and mostly
+        spent waiting on the network, so they are sent concurrently.
+        
+        Args:
+            services: Optional list of services to validate (defaults to all)
         """
-        for service, info in self.services_info.items():
-            # Skip if service is not supported for validation
-            if service not in self.BASE_URLS or service not in self.TEST_ENDPOINTS:
-                info["valid"] = None
-                continue
-                
-            # Prepare request
-            base_url = self.BASE_URLS[service]
-            endpoint = self.TEST_ENDPOINTS[service]
-            headers = {"Authorization": f"Bearer {info['api_key']}"}
+        if services is None:
+            services = list(self.services_info)
+        self._pending_validation.difference_update(services)
+        services = [(s, self.services_info[s]) for s in services if s in self.services_info]
+        if not services:
+            return
             
-            # Different services might have different auth methods
-            if service == "anthropic":
-                headers = {
-                    "x-api-key": info['api_key'],
-                    "anthropic-version": "2023-06-01"
-                }
+        if len(services) == 1:
+            self._validate_service_info(*services[0])
+            return
             
-            try:
-                # Make a test request to validate the key
-                response = requests.get(
-                    f"{base_url}{endpoint}",
-                    headers=headers,
-                    timeout=5
-                )
+        # Create the shared session before any worker threads need it
+        self._get_session()
+        
+        with ThreadPoolExecutor(max_workers=len(services)) as executor:
+            # Consume the results so exceptions are not silently dropped
+            list(executor.map(lambda item: self._validate_service_info(*item), services))
+    
+    @staticmethod
+    def _auth_headers(service: str, api_key: str) -> Dict[str, str]:
+        """
+        Build the authentication headers for a service's API.
+        
+        Args:
+            service: Service name
+            api_key: API key for the service
+            
+        Returns:
+            Dictionary of HTTP headers
+        """
+        # Different services might have different auth methods
+        if service == "anthropic":
+            return {
+                "x-api-key": api_key,
+                "anthropic-version": "2023-06-01"
+            }
+        return {"Authorization": f"Bearer {api_key}"}
+    
+    def _validate_service_info(self, service: str, info: Dict[str, Any]) -> None:
+        """
+        Validate one service's API key and update its info in place.
+        
+        Args:
+            service: Service name to validate
+            info: The service's entry in services_info
+        """
+        # Skip if service is not supported for validation
+        if service not in self.BASE_URLS or service not in self.TEST_ENDPOINTS:
+            info["valid"] = None
+            return
+            
+        try:
+            # Make a test request to validate the key
+            response = self._get_session().get(
+                f"{self.BASE_URLS[service]}{self.TEST_ENDPOINTS[service]}",
+                headers=self._auth_headers(service, info['api_key']),
+                timeout=5
+            )
+            
+            # Check if request was successful
+            if response.status_code == 200:
+                info["valid"] = True
                 
-                # Check if request was successful
-                if response.status_code == 200:
-                    info["valid"] = True
-                    
-                    # Extract available models if possible
-                    try:
-                        data = response.json()
-                        if service == "openai" and "data" in data:
-                            # OpenAI models data structure
-                            info["models"] = [model["id"] for model in data["data"]]
-                        elif service == "anthropic" and "models" in data:
-                            # Anthropic models data structure - direct array of models
-                            info["models"] = data["models"]
-                        elif service == "anthropic" and "data" in data:
-                            # Alternative Anthropic data structure
-                            info["models"] = [model["id"] for model in data["data"]]
-                    except Exception:
-                        # If we can't parse models, that's okay
-                        pass
-                else:
-                    info["valid"] = False
-            except Exception:
-                # Request failed, key is probably invalid
+                # Extract available models if possible
+                try:
+                    data = _json_loads(response.content)
+                    if service == "openai" and "data" in data:
+                        # OpenAI models data structure
+                        info["models"] = [model["id"] for model in data["data"]]
+                    elif service == "anthropic" and "models" in data:
+                        # Anthropic models data structure - direct array of models
+                        info["models"] = data["models"]
+                    elif service == "anthropic" and "data" in data:
+                        # Alternative Anthropic data structure
+                        info["models"] = [model["id"] for model in data["data"]]
+                except Exception:
+                    # If we can't parse models, that's okay
+                    pass
+            else:
                 info["valid"] = False
+        except Exception:
+            # Request failed, key is probably invalid
+            info["valid"] = False
     
     def get_api_key(self, service: str) -> str:
         """
@@ -195,6 +401,7 @@ class KeyManager:
             ValueError: If no API key is found for the service
         """
         if service in self.services_info:
+            self._ensure_validated([service])
             return self.services_info[service]["api_key"]
         
         # Try the older static method as fallback for any other sources
@@ -211,18 +418,24 @@ class KeyManager:
             
         raise ValueError(
             f"API key for {service} not found. Please provide it directly, "
-            f"in a keys file, or set the {self.ENV_PREFIXES.get(service, service.upper() + '_API_KEY')} "
+            f"in a keys file, or set the {self._env_var_name(service)} "
             "environment variable."
         )
     
-    def add_key(self, service: str, key: str, env: bool = False) -> bool:
+    def add_key(self, service: str, key: str, env: bool = False, flush: bool = True) -> bool:
         """
         Add a new API key for a service.
         
+        When adding several keys to the file, pass flush=False and call save()
+        afterwards (or use the KeyManager as a context manager, which saves
+        when the block exits without an error) to write the file once instead
+        of once per key.
+        
         Args:
             service: Service name (e.g., "openai", "anthropic")
             key: API key for the service
             env: Whether to save as environment variable (otherwise to file)
+            flush: Whether to write the keys file immediately
             
         Returns:
             True if successful, False otherwise
@@ -232,16 +445,11 @@ class KeyManager:
             
         # Set as environment variable if requested
         if env:
-            env_var = self.ENV_PREFIXES.get(service, f"{service.upper()}_API_KEY")
+            env_var = self._env_var_name(service)
             os.environ[env_var] = key
             
             # Update our services info
-            self.services_info[service] = {
-                "api_key": key,
-                "source": "environment",
-                "valid": None,  # Not validated yet
-                "models": []    # Not populated yet
-            }
+            self.services_info[service] = _new_info(key, "environment")
             
             # Validate the new key
             self._validate_service_key(service)
@@ -251,35 +459,24 @@ class KeyManager:
         if not self.keys_file:
             self.keys_file = self.LOCAL_KEYS_FILE
             
-        # Load existing keys
-        existing_keys = {}
-        if Path(self.keys_file).exists():
-            try:
-                with open(self.keys_file, 'r') as f:
-                    existing_keys = json.load(f)
-            except json.JSONDecodeError:
-                pass
-        
-        # Update with new key
-        existing_keys[service] = key
+        # Queue the key for the next write to the file
+        previous = self._pending_file_keys.get(service)
+        self._pending_file_keys[service] = key
         
-        # Create directory if needed
-        directory = os.path.dirname(self.keys_file)
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory)
+        try:
+            if flush:
+                self.save()
+        except Exception:
+            # Don't leave a rejected key queued for a later save
+            if previous is None:
+                del self._pending_file_keys[service]
+            else:
+                self._pending_file_keys[service] = previous
+            return False
             
-        # Save back to file
         try:
-            with open(self.keys_file, 'w') as f:
-                json.dump(existing_keys, f, indent=2)
-                
             # Update our services info
-            self.services_info[service] = {
-                "api_key": key,
-                "source": "file",
-                "valid": None,  # Not validated yet
-                "models": []    # Not populated yet
-            }
+            self.services_info[service] = _new_info(key, "file")
             
             # Validate the new key
             self._validate_service_key(service)
@@ -287,6 +484,24 @@ class KeyManager:
         except Exception:
             return False
     
+    def save(self) -> None:
+        """
+        Write the keys added with add_key to the keys file.
+        
+        The current file is re-read first, so keys written to it by others
+        since this KeyManager was created are kept.
+        """
+        # Load existing keys (cheap while the file is unchanged)
+        existing_keys = {}
+        try:
+            existing_keys = dict(_read_keys_file(self.keys_file))
+        except (json.JSONDecodeError, FileNotFoundError):
+            pass
+            
+        existing_keys.update(self._pending_file_keys)
+        _write_keys_file(self.keys_file, existing_keys)
+        self._pending_file_keys.clear()
+    
     def _validate_service_key(self, service: str) -> None:
         """
         Validate a specific service key.
@@ -297,41 +512,8 @@ class KeyManager:
         if service not in self.services_info:
             return
             
-        info = self.services_info[service]
-        
-        # Skip if service is not supported for validation
-        if service not in self.BASE_URLS or service not in self.TEST_ENDPOINTS:
-            info["valid"] = None
-            return
-            
-        # Prepare request
-        base_url = self.BASE_URLS[service]
-        endpoint = self.TEST_ENDPOINTS[service]
-        headers = {"Authorization": f"Bearer {info['api_key']}"}
-        
-        # Different services might have different auth methods
-        if service == "anthropic":
-            headers = {
-                "x-api-key": info['api_key'],
-                "anthropic-version": "2023-06-01"
-            }
-        
-        try:
-            # Make a test request to validate the key
-            response = requests.get(
-                f"{base_url}{endpoint}",
-                headers=headers,
-                timeout=5
-            )
-            
-            # Check if request was successful
-            if response.status_code == 200:
-                info["valid"] = True
-            else:
-                info["valid"] = False
-        except Exception:
-            # Request failed, key is probably invalid
-            info["valid"] = False
+        self._pending_validation.discard(service)
+        self._validate_service_info(service, self.services_info[service])
     
     def update_key(self, service: str, key: str) -> bool:
         """
@@ -352,7 +534,7 @@ class KeyManager:
             source = self.services_info[service]["source"]
             if source == "environment":
                 # Update in environment
-                env_var = self.ENV_PREFIXES.get(service, f"{service.upper()}_API_KEY")
+                env_var = self._env_var_name(service)
                 os.environ[env_var] = key
                 
                 # Update our services info
@@ -370,15 +552,53 @@ class KeyManager:
         # If service doesn't exist, add it
         return self.add_key(service, key, env=False)
     
-    def available_services(self) -> Dict[str, Dict[str, Any]]:
+    def available_services(self) -> Mapping[str, Mapping[str, Any]]:
         """
         Get information about available services and models.
         
         Returns:
-            Dictionary mapping service names to info about keys and models
+            Read-only mapping of service names to info about keys and models
+        """
+        self._ensure_validated()
+        
+        # Read-only views avoid copying every service's info on each call
+        return MappingProxyType({
+            service: MappingProxyType(info) for service, info in self.services_info.items()
+        })
+    
+    def available_services_copy(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get a mutable copy of the available services information.
+        
+        Use this instead of available_services() when the result needs to be
+        modified or passed to json.dumps.
+        
+        Returns:
+            Dictionary mapping service names to plain dicts of key and model info
+        """
+        self._ensure_validated()
+        return {
+            service: dict(info, models=list(info["models"]))
+            for service, info in self.services_info.items()
+        }
+    
+    def get_service_info(self, service: str) -> Optional[Mapping[str, Any]]:
+        """
+        Get information about a single service's key and models.
+        
+        Unlike available_services(), this only validates the requested service.
+        
+        Args:
+            service: Service name (e.g., "openai", "anthropic")
+            
+        Returns:
+            Read-only mapping with the service's key info, or None if the
+            service has no key
         """
-        # Return a copy to avoid external modification
-        return {service: info.copy() for service, info in self.services_info.items()}
+        if service not in self.services_info:
+            return None
+        self._ensure_validated([service])
+        return MappingProxyType(self.services_info[service])
     
     @staticmethod
     def _get_api_key_static(
@@ -413,27 +633,18 @@ class KeyManager:
         if api_key:
             return api_key
         
-        # 2. Try to load from specified keys file
-        if keys_file and os.path.exists(keys_file):
-            key = KeyManager._load_from_file(keys_file, service)
-            if key:
-                return key
-        
-        # 3. Try to load from local keys file
-        if os.path.exists(KeyManager.LOCAL_KEYS_FILE):
-            key = KeyManager._load_from_file(KeyManager.LOCAL_KEYS_FILE, service)
-            if key:
-                return key
-        
-        # 4. Try to load from default keys file in user's home directory
-        if os.path.exists(KeyManager.DEFAULT_KEYS_FILE):
-            key = KeyManager._load_from_file(KeyManager.DEFAULT_KEYS_FILE, service)
+        # 2-4. Try the specified, local and user keys files in that order.
+        # Missing files are skipped by _load_from_file, and a path listed
+        # twice (e.g. keys_file is the local file) is only checked once.
+        candidates = (keys_file, KeyManager.LOCAL_KEYS_FILE, KeyManager.DEFAULT_KEYS_FILE)
+        for candidate in dict.fromkeys(c for c in candidates if c):
+            key = KeyManager._load_from_file(candidate, service)
             if key:
                 return key
         
         # 5. Try to load from environment variable
-        if use_env and service in KeyManager.ENV_PREFIXES:
-            env_var = KeyManager.ENV_PREFIXES[service]
+        env_var = KeyManager._env_var_name(service)
+        if use_env:
             key = os.environ.get(env_var)
             if key:
                 return key
@@ -441,8 +652,7 @@ class KeyManager:
         # If no API key is found, raise an error
         raise ValueError(
             f"API key for {service} not found. Please provide it directly, "
-            f"in a keys file, or set the {KeyManager.ENV_PREFIXES.get(service, service.upper() + '_API_KEY')} "
-            "environment variable."
+            f"in a keys file, or set the {env_var} environment variable."
         )
     
     @staticmethod
@@ -458,24 +668,12 @@ class KeyManager:
             API key if found, None otherwise
         """
         try:
-            with open(file_path, 'r') as f:
-                keys = json.load(f)
+            keys = _read_keys_file(file_path)
                 
             # Try to get the key using various possible formats
-            if service in keys:
-                return keys[service]
-            
-            service_key = f"{service}_api_key"
-            if service_key in keys:
-                return keys[service_key]
-            
-            service_caps = service.upper()
-            if service_caps in keys:
-                return keys[service_caps]
-            
-            service_caps_key = f"{service_caps}_API_KEY"
-            if service_caps_key in keys:
-                return keys[service_caps_key]
+            for name in _key_names(service):
+                if name in keys:
+                    return keys[name]
                 
             return None
         
@@ -496,23 +694,15 @@ class KeyManager:
         """
         file_path = file_path or KeyManager.LOCAL_KEYS_FILE
         
-        # Create directory if it doesn't exist
-        directory = os.path.dirname(file_path)
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory)
-        
         # Load existing keys if the file exists
         existing_keys = {}
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f:
-                    existing_keys = json.load(f)
-            except json.JSONDecodeError:
-                pass
+        try:
+            existing_keys = dict(_read_keys_file(file_path))
+        except (json.JSONDecodeError, FileNotFoundError):
+            pass
         
         # Update with new keys
         existing_keys.update(keys)
         
         # Write updated keys to file
-        with open(file_path, 'w') as f:
-            json.dump(existing_keys, f, indent=2) 
\ No newline at end of file
+        _write_keys_file(file_path, existing_keys) 
\ No newline at end of file
@@ -5,8 +5,9 @@ This module provides utilities for handling streaming responses
 from AI APIs like OpenAI and Anthropic.
 """
 
-import json
-from typing import Iterator, Dict, Any, Callable, Optional
+import sys
+from typing import Iterator, Callable, Optional
+from .utils import _json_loads
 
 
 class StreamProcessor:
@@ -17,6 +18,34 @@ class StreamProcessor:
     extracting content chunks as they arrive.
     """
     
+    @staticmethod
+    def iter_lines(chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """
+        Split raw byte chunks from a streaming response into lines.
+        
+        This lets callers read a response in large blocks, e.g. with
+        response.iter_content(chunk_size=65536), rather than line by line.
+        
+        Args:
+            chunks: Iterator of raw byte chunks
+            
+        Returns:
+            Iterator of lines without their line terminators
+        """
+        buffer = b""
+        for chunk in chunks:
+            if not chunk:
+                continue
+            buffer += chunk
+            lines = buffer.split(b"\n")
+            # The last piece may be an incomplete line, keep it for the next chunk
+            buffer = lines.pop()
+            for line in lines:
+                yield line.rstrip(b"\r")
+                
+        if buffer:
+            yield buffer.rstrip(b"\r")
+    
     @staticmethod
     def process_openai_stream(
         response_iterator: Iterator[bytes],
@@ -46,7 +75,7 @@ class StreamProcessor:
                     break
                     
                 try:
-                    chunk = json.loads(data)
+                    chunk = _json_loads(data)
                     if "choices" in chunk and len(chunk["choices"]) > 0:
                         delta = chunk["choices"][0].get("delta", {})
                         if "content" in delta:
@@ -88,7 +117,7 @@ class StreamProcessor:
                 data = line[6:]
                 
                 try:
-                    chunk = json.loads(data)
+                    chunk = _json_loads(data)
                     
                     # Handle messages API format
                     if "type" in chunk and chunk["type"] == "content_block_delta":
@@ -121,4 +150,5 @@ class StreamProcessor:
         Args:
             content: Content chunk to print
         """
-        print(content, end="", flush=True) 
\ No newline at end of file
+        sys.stdout.write(content)
+        sys.stdout.flush() 
\ No newline at end of file
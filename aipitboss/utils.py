@@ -8,28 +8,106 @@ including retry logic, prompt formatting, and response parsing.
 """
 
 import json
+import random
 import time
-from typing import Dict, Any, Callable, Optional, Union, List, TypeVar
+from functools import lru_cache
+from typing import Dict, Any, Callable, Optional, Union, List, Tuple, TypeVar
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup, fall back to stdlib json
+    orjson = None
 
 T = TypeVar('T')
 
 
+def _json_loads(data: Union[str, bytes, bytearray]) -> Any:
+    """
+    Parse JSON from a string or bytes, using orjson when it is installed.
+    
+    Args:
+        data: JSON document as str or bytes
+        
+    Returns:
+        The parsed Python object
+        
+    Raises:
+        ValueError: If the data is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 encoded JSON, using orjson when it is installed.
+    
+    Both backends write non-ASCII text unescaped and convert non-string dict
+    keys (e.g. the token ids in logit_bias) to strings. They differ only for
+    non-finite floats: orjson writes NaN and Infinity as null, while the
+    stdlib fallback writes the non-standard NaN/Infinity literals.
+    
+    Args:
+        obj: Object to serialize
+        indent: Whether to pretty-print with a two space indent
+        
+    Returns:
+        The JSON document as bytes
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class _SessionMixin:
+    """Reusable HTTP session, so repeated API requests keep connections alive."""
+    
+    _session = None
+    
+    def _get_session(self):
+        """Get the HTTP session, creating it on first use."""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+    
+    def close(self) -> None:
+        """Close the HTTP session."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
 def retry(
     func: Callable[..., T],
     max_retries: int = 3,
     retry_delay: float = 1.0,
     backoff_factor: float = 2.0,
-    errors_to_retry: tuple = (Exception,)
+    errors_to_retry: tuple = (Exception,),
+    max_delay: float = 30.0,
+    jitter: bool = True
 ) -> T:
     """
     Retry a function with exponential backoff.
     
+    With jitter enabled, each wait is a random time between zero and the
+    current backoff delay, so many clients failing at once do not all retry
+    at the same moment.
+    
     Args:
         func: The function to retry
         max_retries: Maximum number of retries
         retry_delay: Initial delay between retries in seconds
         backoff_factor: Factor to increase delay by after each retry
         errors_to_retry: Tuple of exceptions that should trigger a retry
+        max_delay: Maximum delay between retries in seconds
+        jitter: Whether to randomize each delay between 0 and the backoff delay
         
     Returns:
         The result of the function
@@ -38,7 +116,6 @@ def retry(
         Exception: The last exception raised by the function
     """
     last_exception = None
-    delay = retry_delay
     
     for attempt in range(max_retries + 1):
         try:
@@ -46,8 +123,8 @@ def retry(
         except errors_to_retry as e:
             last_exception = e
             if attempt < max_retries:
-                time.sleep(delay)
-                delay *= backoff_factor
+                delay = min(max_delay, retry_delay * backoff_factor ** attempt)
+                time.sleep(random.uniform(0, delay) if jitter else delay)
             else:
                 raise last_exception
 
@@ -70,27 +147,41 @@ def format_prompt(
 
 
 def parse_json_response(
-    response: str, 
+    response: Union[str, bytes], 
     default: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Parse a JSON response string, handling errors.
     
     Args:
-        response: JSON string to parse
+        response: JSON string or bytes to parse
         default: Default value to return if parsing fails
         
     Returns:
         Parsed JSON as a dictionary
     """
     try:
-        return json.loads(response)
-    except json.JSONDecodeError:
+        return _json_loads(response)
+    except (ValueError, TypeError):
         if default is None:
             default = {}
         return default
 
 
+@lru_cache(maxsize=256)
+def _compile_path(path: str) -> Tuple[Union[str, int], ...]:
+    """
+    Split a dot-separated response path into keys, converting array indices.
+    
+    Args:
+        path: Dot-separated path (e.g., 'choices.0.message.content')
+        
+    Returns:
+        Tuple of dictionary keys and integer list indices
+    """
+    return tuple(int(key) if key.isdigit() else key for key in path.split("."))
+
+
 def extract_text_from_response(
     response: Dict[str, Any],
     path: Union[str, List[str]],
@@ -107,15 +198,17 @@ def extract_text_from_response(
     Returns:
         Extracted text
     """
+    # String paths are parsed once and cached, as the same few paths are
+    # typically used for every response
     if isinstance(path, str):
-        path = path.split(".")
+        keys = _compile_path(path)
+    else:
+        # Handle array indices in path (e.g., ['choices', '0', 'text'])
+        keys = [int(key) if key.isdigit() else key for key in path]
         
     current = response
     try:
-        for key in path:
-            # Handle array indices in path (e.g., 'choices.0.text')
-            if key.isdigit():
-                key = int(key)
+        for key in keys:
             current = current[key]
         return str(current)
     except (KeyError, IndexError, TypeError):
@@ -7,26 +7,28 @@ to interact with Anthropic's Claude API. It includes progress reporting
 and token usage tracking.
 """
 
-import time
+import os
 import sys
+import time
+import traceback
 from aipitboss.key_manager import KeyManager
 from aipitboss.ai_service import AiService
 from aipitboss.chat import Chat
 
 
+def print_banner(title):
+    """Print a centered banner title."""
+    print(f"\n{'='*70}\n{title.center(70)}\n{'='*70}\n")
+
+
 def print_step(step_num, description):
     """Print a step in the process with formatting."""
-    print(f"\n{'='*70}")
-    print(f"STEP {step_num}: {description}")
-    print(f"{'='*70}")
-    time.sleep(0.5)  # Small delay for readability
+    print(f"\n{'='*70}\nSTEP {step_num}: {description}\n{'='*70}")
 
 
 def main():
     """Main function demonstrating Anthropic chat usage."""
-    print("\n" + "="*70)
-    print("Anthropic Chat Example using AIPitBoss".center(70))
-    print("="*70 + "\n")
+    print_banner("Anthropic Chat Example using AIPitBoss")
 
     try:
         # Step 1: Initialize KeyManager
@@ -89,9 +91,9 @@ def main():
         
         # Print service status
         status = ai_service.get_status()
-        print("\nService Status:")
-        for key, value in status.items():
-            print(f"  {key}: {value}")
+        sys.stdout.write("\nService Status:\n" + "".join(
+            f"  {key}: {value}\n" for key, value in status.items()
+        ))
 
         # Step 4: Create Chat instance
         print_step(4, "Creating Chat Instance")
@@ -113,11 +115,13 @@ def main():
         print(f"\n{response1}\n")
         
         # Check token usage after first question
-        print("\nToken Usage After Question 1:")
-        print(f"  Input tokens: {ai_service.tokens_in}")
-        print(f"  Output tokens: {ai_service.tokens_out}")
-        print(f"  Total tokens: {ai_service.tokens_in + ai_service.tokens_out}")
-        print(f"  Remaining budget: {ai_service.token_budget}")
+        print("\n".join([
+            "\nToken Usage After Question 1:",
+            f"  Input tokens: {ai_service.tokens_in}",
+            f"  Output tokens: {ai_service.tokens_out}",
+            f"  Total tokens: {ai_service.tokens_in + ai_service.tokens_out}",
+            f"  Remaining budget: {ai_service.token_budget}"
+        ]))
         
         # Second question - follow-up
         question2 = "Can you explain more about Anthropic's Constitutional AI approach?"
@@ -129,26 +133,28 @@ def main():
         print(f"\n{response2}\n")
         
         # Check token usage after second question
-        print("\nToken Usage After Question 2:")
-        print(f"  Input tokens: {ai_service.tokens_in}")
-        print(f"  Output tokens: {ai_service.tokens_out}")
-        print(f"  Total tokens: {ai_service.tokens_in + ai_service.tokens_out}")
-        print(f"  Remaining budget: {ai_service.token_budget}")
+        print("\n".join([
+            "\nToken Usage After Question 2:",
+            f"  Input tokens: {ai_service.tokens_in}",
+            f"  Output tokens: {ai_service.tokens_out}",
+            f"  Total tokens: {ai_service.tokens_in + ai_service.tokens_out}",
+            f"  Remaining budget: {ai_service.token_budget}"
+        ]))
         
         # Step 6: Demonstrate conversation history
         print_step(6, "Conversation History")
-        print("Current conversation history contains:")
-        for i, message in enumerate(chat.conversation_history):
-            print(f"  Message {i+1}: [{message['role']}] {message['content'][:50]}...")
+        sys.stdout.write("Current conversation history contains:\n" + "".join(
+            f"  Message {i}: [{message['role']}] {message['content'][:50]}...\n"
+            for i, message in enumerate(chat.conversation_history, 1)
+        ))
 
-        print("\n" + "="*70)
-        print("Anthropic Chat Example Completed Successfully".center(70))
-        print("="*70 + "\n")
+        print_banner("Anthropic Chat Example Completed Successfully")
 
     except Exception as e:
-        print(f"\n❌ Error occurred: {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc()
+        print(f"\n❌ Error occurred: {type(e).__name__}: {e}", file=sys.stderr)
+        # Full tracebacks only when debugging (set AIPB_DEBUG=1)
+        if os.getenv("AIPB_DEBUG"):
+            traceback.print_exc(file=sys.stderr)
         
         # For Anthropic API errors, provide more helpful information
         if "401" in str(e) and "anthropic" in str(e).lower():
@@ -10,37 +10,41 @@ This example demonstrates the enhanced features of the Chat class, including:
 - Saving and loading chats
 """
 
-import time
 import os
+import sys
+import time
+import traceback
 from aipitboss.key_manager import KeyManager
 from aipitboss.ai_service import AiService
 from aipitboss.chat import Chat
 
 
+def print_banner(title):
+    """Print a centered banner title."""
+    print(f"\n{'='*70}\n{title.center(70)}\n{'='*70}\n")
+
+
 def print_step(step_num, description):
     """Print a step in the process with formatting."""
-    print(f"\n{'='*70}")
-    print(f"STEP {step_num}: {description}")
-    print(f"{'='*70}")
+    print(f"\n{'='*70}\nSTEP {step_num}: {description}\n{'='*70}")
 
 
 def print_messages(messages):
     """Print conversation messages with formatting."""
-    for i, msg in enumerate(messages):
-        role = msg["role"]
+    lines = []
+    for i, msg in enumerate(messages, 1):
         content = msg["content"]
         # Truncate content if too long
         if len(content) > 100:
             content = content[:97] + "..."
         
-        print(f"  Message {i+1}: [{role}] {content}")
+        lines.append(f"  Message {i}: [{msg['role']}] {content}\n")
+    sys.stdout.write("".join(lines))
 
 
 def main():
     """Main function demonstrating enhanced Chat features."""
-    print("\n" + "="*70)
-    print("Enhanced Chat Example using AIPitBoss".center(70))
-    print("="*70 + "\n")
+    print_banner("Enhanced Chat Example using AIPitBoss")
 
     try:
         # Step 1: Initialize KeyManager
@@ -109,9 +113,9 @@ def main():
         
         # Print service status
         status = openai_service.get_status()
-        print("\nService Status:")
-        for key, value in status.items():
-            print(f"  {key}: {value}")
+        sys.stdout.write("\nService Status:\n" + "".join(
+            f"  {key}: {value}\n" for key, value in status.items()
+        ))
 
         # Step 4: Create Chat instance
         print_step(4, "Creating Chat Instance")
@@ -134,12 +138,14 @@ def main():
         
         # Get information about the request
         info = chat.last_as_info()
-        print("\nLast Request Information:")
-        print(f"  Time taken: {info['time_taken']:.2f} seconds")
-        print(f"  Input tokens: {info['tokens_in']}")
-        print(f"  Output tokens: {info['tokens_out']}")
-        print(f"  Service: {info['service']}")
-        print(f"  Model: {info['model']}")
+        print("\n".join([
+            "\nLast Request Information:",
+            f"  Time taken: {info['time_taken']:.2f} seconds",
+            f"  Input tokens: {info['tokens_in']}",
+            f"  Output tokens: {info['tokens_out']}",
+            f"  Service: {info['service']}",
+            f"  Model: {info['model']}"
+        ]))
         
         # Second question that builds on the first
         question2 = "How does Mars compare to Earth in terms of gravity and atmosphere?"
@@ -196,10 +202,12 @@ def main():
                 
                 # Get information about the Anthropic request
                 info = chat.last_as_info()
-                print("\nAnthropic Request Information:")
-                print(f"  Time taken: {info['time_taken']:.2f} seconds")
-                print(f"  Service: {info['service']}")
-                print(f"  Model: {info['model']}")
+                print("\n".join([
+                    "\nAnthropic Request Information:",
+                    f"  Time taken: {info['time_taken']:.2f} seconds",
+                    f"  Service: {info['service']}",
+                    f"  Model: {info['model']}"
+                ]))
             except Exception as e:
                 print(f"❌ Error when using Anthropic service: {e}")
                 print("Reverting to OpenAI service")
@@ -236,14 +244,13 @@ def main():
         else:
             print(f"Could not find saved chat file: {chat_file}")
         
-        print("\n" + "="*70)
-        print("Enhanced Chat Example Completed Successfully".center(70))
-        print("="*70 + "\n")
+        print_banner("Enhanced Chat Example Completed Successfully")
 
     except Exception as e:
-        print(f"❌ Error occurred: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"❌ Error occurred: {type(e).__name__}: {e}", file=sys.stderr)
+        # Full tracebacks only when debugging (set AIPB_DEBUG=1)
+        if os.getenv("AIPB_DEBUG"):
+            traceback.print_exc(file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -7,6 +7,7 @@ It prompts for API keys and saves them to a .keys.json file.
 """
 
 import os
+import sys
 import json
 import getpass
 from pathlib import Path
@@ -16,10 +17,16 @@ try:
     from aipitboss.key_manager import KeyManager
 except ImportError:
     # For development, when running from the source tree
-    import sys
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from aipitboss.key_manager import KeyManager
 
+# Services to ask for, as (service name, display label) pairs
+SERVICES = (
+    ("openai", "OpenAI"),
+    ("anthropic", "Anthropic"),
+    ("huggingface", "HuggingFace"),
+)
+
 
 def setup_keys():
     """
@@ -32,23 +39,21 @@ def setup_keys():
     print("Keys will be saved to .keys.json in the current directory.")
     print("\nPress Ctrl+C at any time to exit without saving.\n")
     
-    # Dictionary to store the keys
-    keys = {}
-    
-    # Ask for OpenAI API key
-    openai_key = getpass.getpass("OpenAI API Key (hidden input): ").strip()
-    if openai_key:
-        keys["openai"] = openai_key
-    
-    # Ask for Anthropic API key
-    anthropic_key = getpass.getpass("Anthropic API Key (hidden input): ").strip()
-    if anthropic_key:
-        keys["anthropic"] = anthropic_key
+    # Piped input (e.g. scripted setup) is read directly, as getpass would
+    # warn and fall back to reading stdin anyway
+    if sys.stdin.isatty():
+        read_key = getpass.getpass
+    else:
+        def read_key(prompt):
+            print(prompt, end="", flush=True)
+            return sys.stdin.readline().rstrip("\n")
     
-    # Ask for HuggingFace API key
-    huggingface_key = getpass.getpass("HuggingFace API Key (hidden input): ").strip()
-    if huggingface_key:
-        keys["huggingface"] = huggingface_key
+    # Ask for each service's API key, keeping only the ones provided
+    keys = {}
+    for service, label in SERVICES:
+        key = read_key(f"{label} API Key (hidden input): ").strip()
+        if key:
+            keys[service] = key
     
     # Save keys if any were provided
     if keys:
@@ -0,0 +1,47 @@
+"""
+Shared fixtures for the AIPitBoss tests.
+"""
+
+import os
+import pytest
+from aipitboss import utils
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--runlive",
+        action="store_true",
+        default=False,
+        help="run tests marked live, which call the real AI service APIs"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    # Live tests are skipped before any of their fixtures run unless asked for
+    if config.getoption("--runlive"):
+        return
+    skip_live = pytest.mark.skip(reason="live API test, use --runlive to run")
+    for item in items:
+        if "live" in item.keywords:
+            item.add_marker(skip_live)
+
+
+@pytest.fixture(scope="session")
+def keys_file_path():
+    """Path to the .keys.json used by live tests, or None if there is none"""
+    keys_file = ".keys.json"
+    try:
+        os.stat(keys_file)
+    except FileNotFoundError:
+        return None
+    return keys_file
+
+
+@pytest.fixture(params=["stdlib", "orjson"])
+def json_backend(request, monkeypatch):
+    """Run a test once with the stdlib json fallback and once with orjson"""
+    if request.param == "orjson":
+        monkeypatch.setattr(utils, "orjson", pytest.importorskip("orjson"))
+    else:
+        monkeypatch.setattr(utils, "orjson", None)
+    return request.param
@@ -0,0 +1,114 @@
+"""
+Tests for the AiService class.
+"""
+
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from aipitboss.ai_service import AiService
+from aipitboss.key_manager import KeyManager
+
+
+@pytest.fixture
+def stub_keys():
+    """KeyManager stand-in with a valid OpenAI key and two listed models"""
+    keys = MagicMock(spec=KeyManager)
+    keys.get_service_info.return_value = {
+        "api_key": "test-key",
+        "source": "file",
+        "valid": True,
+        "models": ["gpt-3.5-turbo", "gpt-4"]
+    }
+    keys.get_api_key.return_value = "test-key"
+    return keys
+
+
+@pytest.fixture
+def keys_file(tmp_path):
+    """Keys file with keys for three services"""
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({
+        "openai": "test-openai-key",
+        "anthropic": "test-anthropic-key",
+        "huggingface": "test-huggingface-key"
+    }))
+    return str(path)
+
+
+def test_init_validates_only_its_service(keys_file):
+    """Test that creating a service only validates that service's key"""
+    mock_response = MagicMock(status_code=200, content=b'{"data": [{"id": "gpt-4"}]}')
+    
+    with patch('requests.Session.get', return_value=mock_response) as mock_get:
+        keys = KeyManager(keys_file=keys_file, use_env=False, validate_keys=True)
+        service = AiService(keys, "openai", "gpt-4")
+    
+    assert service.initialized
+    assert mock_get.call_count == 1
+    assert keys.services_info["anthropic"]["valid"] is None
+
+
+def test_chat_completion_request_body(stub_keys):
+    """Test that chat_completion sends the payload as pre-encoded JSON bytes"""
+    service = AiService(stub_keys, "openai", "gpt-4")
+    mock_response = MagicMock(
+        status_code=200,
+        content=b'{"choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 5}}'
+    )
+    messages = [{"role": "user", "content": "Hi \u00e9"}]
+    
+    with patch.object(service, '_get_session') as mock_session:
+        mock_session.return_value.post.return_value = mock_response
+        result = service.chat_completion(messages, max_tokens=10)
+    
+    _, kwargs = mock_session.return_value.post.call_args
+    assert isinstance(kwargs["data"], bytes)
+    assert "json" not in kwargs
+    assert json.loads(kwargs["data"]) == {
+        "model": "gpt-4",
+        "messages": messages,
+        "temperature": 0.7,
+        "max_tokens": 10
+    }
+    assert kwargs["headers"]["Content-Type"] == "application/json"
+    assert result["usage"]["prompt_tokens"] == 3
+    assert (service.tokens_in, service.tokens_out) == (3, 5)
+
+
+def test_chat_completion_non_str_keys(stub_keys, json_backend):
+    """Test that kwargs with integer dict keys serialize with either JSON backend"""
+    service = AiService(stub_keys, "openai", "gpt-4")
+    
+    with patch.object(service, '_get_session') as mock_session:
+        mock_session.return_value.post.return_value = MagicMock(status_code=200, content=b'{}')
+        service.chat_completion([{"role": "user", "content": "Hi"}], logit_bias={50256: -100})
+    
+    _, kwargs = mock_session.return_value.post.call_args
+    assert json.loads(kwargs["data"])["logit_bias"] == {"50256": -100}
+
+
+def test_chat_completion_serialization_error_is_wrapped(stub_keys):
+    """Test that a payload that cannot be serialized raises the usual chat completion error"""
+    service = AiService(stub_keys, "openai", "gpt-4")
+    
+    with patch.object(service, '_get_session') as mock_session:
+        with pytest.raises(Exception, match="Error in chat completion"):
+            service.chat_completion([{"role": "user", "content": "Hi"}], user=object())
+    
+    mock_session.return_value.post.assert_not_called()
+
+def test_set_model_accepts_listed_model(stub_keys):
+    """Test that set_model switches to a model the service lists"""
+    service = AiService(stub_keys, "openai", "gpt-4")
+    
+    assert service.set_model("gpt-3.5-turbo") is True
+    assert service.model == "gpt-3.5-turbo"
+    stub_keys.get_service_info.assert_called_with("openai")
+
+
+def test_set_model_rejects_unknown_model(stub_keys):
+    """Test that set_model keeps the current model when the new one is not listed"""
+    service = AiService(stub_keys, "openai", "gpt-4")
+    
+    assert service.set_model("not-a-model") is False
+    assert service.model == "gpt-4"
@@ -4,50 +4,64 @@ Tests for the Chat class.
 
 import pytest
 import os
-from pathlib import Path
+import json
+from types import MappingProxyType
 from unittest.mock import patch, MagicMock
 from aipitboss.chat import Chat
 from aipitboss.ai_service import AiService
 from aipitboss.key_manager import KeyManager
 
 
+# Canned API responses, shared by every test and wrapped in read-only mappings
+OPENAI_RESPONSE = MappingProxyType({
+    "choices": [MappingProxyType({"message": MappingProxyType({"content": "Mock response"})})]
+})
+GENERIC_RESPONSE = MappingProxyType({
+    "content": [MappingProxyType({"text": "Mock response"})]
+})
+
+
+class FakeAiService:
+    """Lightweight stand-in for AiService with just what Chat uses"""
+    
+    def __init__(self, service_supplier, model, response):
+        self.service_supplier = service_supplier
+        self.model = model
+        self.api_key = "test-key"
+        self.base_url = "https://api.example.com/v1"
+        self.initialized = True
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.token_budget = 1000000
+        self.hold = False
+        self.response = response
+        self.calls = []
+        self.session = None
+    
+    def is_available(self):
+        return True
+    
+    def chat_completion(self, messages, **kwargs):
+        self.calls.append(kwargs)
+        return self.response
+    
+    def _get_session(self):
+        # Only the streaming tests need a mock session
+        if self.session is None:
+            self.session = MagicMock()
+        return self.session
+
+
 @pytest.fixture
 def openai_service_mock():
     """Mock OpenAI service for testing"""
-    mock_service = MagicMock(spec=AiService)
-    # Add required attributes for Chat class
-    mock_service.service_supplier = "openai"
-    mock_service.model = "gpt-3.5-turbo"
-    mock_service.api_key = "test-key"
-    mock_service.initialized = True
-    mock_service.tokens_in = 0
-    mock_service.tokens_out = 0
-    mock_service.token_budget = 1000000
-    mock_service.hold = False
-    
-    mock_service.chat_completion.return_value = {
-        "choices": [{"message": {"content": "Mock response"}}]
-    }
-    return mock_service
+    return FakeAiService("openai", "gpt-3.5-turbo", OPENAI_RESPONSE)
 
 
 @pytest.fixture
 def generic_service_mock():
     """Mock generic service for testing"""
-    mock_service = MagicMock()
-    # Add required attributes
-    mock_service.service_supplier = "generic"
-    mock_service.model = "test-model"
-    mock_service.initialized = True
-    mock_service.tokens_in = 0
-    mock_service.tokens_out = 0
-    mock_service.token_budget = 1000000
-    mock_service.hold = False
-    
-    mock_service.chat_completion.return_value = {
-        "content": [{"text": "Mock response"}]
-    }
-    return mock_service
+    return FakeAiService("generic", "test-model", GENERIC_RESPONSE)
 
 
 def test_chat_init(openai_service_mock):
@@ -73,6 +87,15 @@ def test_ask_question_openai(openai_service_mock):
     assert chat.conversation_history[2]["content"] == "Mock response"
 
 
+def test_ask_question_model_override(openai_service_mock):
+    """Test that a per-question model is passed on and recorded"""
+    chat = Chat(openai_service_mock)
+    chat.ask_question("Hello", model="gpt-4")
+    
+    assert openai_service_mock.calls[-1]["model"] == "gpt-4"
+    assert chat.last_as_info()["model"] == "gpt-4"
+
+
 def test_ask_question_generic_service(generic_service_mock):
     """Test ask_question with a generic service"""
     chat = Chat(generic_service_mock)
@@ -118,16 +141,159 @@ def test_clear_history(openai_service_mock):
     assert chat.conversation_history[0]["role"] == "system"
 
 
+def test_max_turns(openai_service_mock):
+    """Test that only the last max_turns exchanges are sent"""
+    chat = Chat(openai_service_mock, max_turns=1)
+    for question in ["One", "Two", "Three"]:
+        chat.ask_question(question)
+    
+    # The system message stays, the first exchange is dropped
+    assert [m["content"] for m in chat.conversation_history] == [
+        "You are a helpful, concise assistant.",
+        "Two", "Mock response",
+        "Three", "Mock response"
+    ]
+
+
+
+def test_max_turns_negative(openai_service_mock):
+    """Test that a negative max_turns is rejected"""
+    with pytest.raises(ValueError):
+        Chat(openai_service_mock, max_turns=-1)
+
+
+def test_max_turns_after_failed_question(openai_service_mock):
+    """Test that trimming never leaves an assistant message first"""
+    chat = Chat(openai_service_mock, max_turns=1)
+    chat.ask_question("One")
+    
+    # A failed request leaves its question without an answer
+    with patch.object(openai_service_mock, "chat_completion", side_effect=RuntimeError("down")):
+        with pytest.raises(RuntimeError):
+            chat.ask_question("Two")
+    
+    chat.ask_question("Three")
+    
+    assert [m["content"] for m in chat.conversation_history] == [
+        "You are a helpful, concise assistant.",
+        "Two", "Three", "Mock response"
+    ]
+
+
+def test_max_turns_after_replace_history(openai_service_mock):
+    """Test that the summary from replace_history is trimmed like a question"""
+    chat = Chat(openai_service_mock, max_turns=1)
+    chat.replace_history("Summary")
+    for question in ["One", "Two"]:
+        chat.ask_question(question)
+    
+    assert [m["role"] for m in chat.conversation_history] == [
+        "system", "user", "assistant", "user", "assistant"
+    ]
+    assert chat.conversation_history[1]["content"] == "One"
+
+def test_stream_question_openai(openai_service_mock):
+    """Test streaming a response from OpenAI"""
+    openai_service_mock.base_url = "https://api.openai.com/v1"
+    # Chunk boundaries deliberately fall in the middle of events
+    body = (
+        b'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n'
+        b'data: {"choices": [{"delta": {"content": "lo"}}]}\n\n'
+        b'data: [DONE]\n\n'
+    )
+    mock_response = MagicMock()
+    mock_response.iter_content.return_value = [body[:20], body[20:70], body[70:]]
+    
+    chunks = []
+    chat = Chat(openai_service_mock)
+    mock_post = openai_service_mock._get_session().post
+    mock_post.return_value = mock_response
+    response = chat.stream_question("Hello", chunk_handler=chunks.append)
+    
+    assert response == "Hello"
+    assert chunks == ["Hel", "lo"]
+    assert json.loads(mock_post.call_args[1]["data"])["stream"] is True
+    assert chat.conversation_history[-1] == {"role": "assistant", "content": "Hello"}
+    mock_response.close.assert_called_once()
+
+
+def test_stream_question_anthropic(openai_service_mock):
+    """Test streaming a response from Anthropic"""
+    openai_service_mock.service_supplier = "anthropic"
+    openai_service_mock.model = "claude-3-haiku"
+    openai_service_mock.base_url = "https://api.anthropic.com/v1"
+    body = (
+        b'event: content_block_delta\n'
+        b'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Hi"}}\n\n'
+        b'event: content_block_delta\n'
+        b'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "!"}}\n\n'
+        b'event: message_stop\n'
+        b'data: {"type": "message_stop"}\n\n'
+    )
+    mock_response = MagicMock()
+    mock_response.iter_content.return_value = [body[:50], body[50:]]
+    
+    chat = Chat(openai_service_mock, "Be brief.")
+    mock_post = openai_service_mock._get_session().post
+    mock_post.return_value = mock_response
+    response = chat.stream_question("Hello")
+    
+    assert response == "Hi!"
+    payload = json.loads(mock_post.call_args[1]["data"])
+    assert payload["system"] == "Be brief."
+    assert payload["messages"] == [{"role": "user", "content": "Hello"}]
+    assert mock_post.call_args[0][0] == "https://api.anthropic.com/v1/messages"
+
+
+def test_save_and_load_chat(openai_service_mock, tmp_path):
+    """Test saving a chat and loading it back"""
+    chat = Chat(openai_service_mock)
+    chat.ask_question("Hello")
+    chat_file = tmp_path / "chat.json"
+    
+    chat.save_chat(str(chat_file))
+    
+    # One line for the settings plus one line per message
+    lines = chat_file.read_bytes().splitlines()
+    assert len(lines) == 1 + len(chat.conversation_history)
+    assert "meta" in json.loads(lines[0])
+    
+    new_chat = Chat(openai_service_mock, "")
+    new_chat.load_chat(str(chat_file))
+    
+    assert new_chat.conversation_history == chat.conversation_history
+    assert new_chat.system_message == chat.system_message
+
+
+def test_load_chat_legacy_format(openai_service_mock, tmp_path):
+    """Test loading a chat saved as a single pretty-printed JSON document"""
+    history = [
+        {"role": "system", "content": "Be brief."},
+        {"role": "user", "content": "Hello"},
+        {"role": "assistant", "content": "Hi"}
+    ]
+    chat_file = tmp_path / "chat.json"
+    chat_file.write_text(json.dumps({
+        "conversation_history": history,
+        "system_message": "Be brief."
+    }, indent=2))
+    
+    chat = Chat(openai_service_mock, "")
+    chat.load_chat(str(chat_file))
+    
+    assert chat.conversation_history == history
+    assert chat.system_message == "Be brief."
+
+
 @pytest.mark.live
-def test_real_openai_connection():
+def test_real_openai_connection(keys_file_path):
     """Test a real connection to OpenAI API (requires valid API key)"""
     # Skip if no API key
-    keys_file = Path(".keys.json")
-    if not keys_file.exists():
+    if not keys_file_path:
         pytest.skip("No .keys.json file found for live API testing")
     
     # Initialize service with key from file
-    keys = KeyManager(keys_file=str(keys_file))
+    keys = KeyManager(keys_file=str(keys_file_path))
     openai = AiService(keys, "openai", "gpt-3.5-turbo")
     
     # Skip if service initialization failed
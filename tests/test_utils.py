@@ -0,0 +1,95 @@
+"""
+Tests for the utility functions.
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+from aipitboss.utils import retry, parse_json_response, _json_dumps, _json_loads
+
+
+def _failing(times, result="ok"):
+    """Callable that raises ValueError for its first `times` calls"""
+    return MagicMock(side_effect=[ValueError(f"fail {i}") for i in range(times)] + [result])
+
+
+def test_retry_exact_delays_without_jitter():
+    """Test that jitter=False sleeps exactly retry_delay * backoff_factor ** attempt"""
+    func = _failing(3)
+    
+    with patch('aipitboss.utils.time.sleep') as mock_sleep, \
+         patch('aipitboss.utils.random.uniform') as mock_uniform:
+        result = retry(func, max_retries=3, retry_delay=0.5, backoff_factor=3.0, jitter=False)
+    
+    assert result == "ok"
+    assert func.call_count == 4
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [0.5, 1.5, 4.5]
+    mock_uniform.assert_not_called()
+
+
+def test_retry_delays_capped_at_max_delay():
+    """Test that the backoff delay never exceeds max_delay, with or without jitter"""
+    with patch('aipitboss.utils.time.sleep') as mock_sleep:
+        retry(_failing(4), max_retries=4, retry_delay=1.0, backoff_factor=10.0,
+              max_delay=5.0, jitter=False)
+    
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [1.0, 5.0, 5.0, 5.0]
+    
+    with patch('aipitboss.utils.time.sleep') as mock_sleep, \
+         patch('aipitboss.utils.random.uniform', side_effect=lambda a, b: b) as mock_uniform:
+        retry(_failing(4), max_retries=4, retry_delay=1.0, backoff_factor=10.0, max_delay=5.0)
+    
+    assert [c.args for c in mock_uniform.call_args_list] == [(0, 1.0), (0, 5.0), (0, 5.0), (0, 5.0)]
+    assert all(c.args[0] <= 5.0 for c in mock_sleep.call_args_list)
+
+
+def test_retry_reraises_last_exception():
+    """Test that the last exception is re-raised once retries are exhausted"""
+    func = _failing(3)
+    
+    with patch('aipitboss.utils.time.sleep') as mock_sleep:
+        with pytest.raises(ValueError, match="fail 2"):
+            retry(func, max_retries=2, jitter=False)
+    
+    assert func.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+def test_retry_does_not_retry_other_errors():
+    """Test that errors outside errors_to_retry propagate immediately"""
+    func = MagicMock(side_effect=KeyError("boom"))
+    
+    with patch('aipitboss.utils.time.sleep') as mock_sleep:
+        with pytest.raises(KeyError):
+            retry(func, errors_to_retry=(ValueError,))
+    
+    assert func.call_count == 1
+    mock_sleep.assert_not_called()
+
+
+def test_parse_json_response_accepts_bytes():
+    """Test that raw response bytes are parsed like a string"""
+    assert parse_json_response(b'{"text": "caf\xc3\xa9"}') == {"text": "caf\u00e9"}
+    assert parse_json_response('{"a": [1, 2]}') == {"a": [1, 2]}
+
+
+def test_parse_json_response_returns_default():
+    """Test that invalid JSON and non-string input return the default"""
+    assert parse_json_response(b"not json") == {}
+    assert parse_json_response(None) == {}
+    assert parse_json_response(None, default={"error": True}) == {"error": True}
+
+
+def test_json_dumps_non_str_keys(json_backend):
+    """Test that integer dict keys are written as strings by both backends"""
+    assert _json_dumps({"logit_bias": {50256: -100}}) == b'{"logit_bias":{"50256":-100}}'
+
+
+def test_json_dumps_unicode_and_indent(json_backend):
+    """Test that both backends write the same compact and indented output"""
+    obj = {"text": "caf\u00e9", "items": [1, 2]}
+    
+    assert _json_dumps(obj) == '{"text":"caf\u00e9","items":[1,2]}'.encode('utf-8')
+    assert _json_dumps(obj, indent=True) == (
+        '{\n  "text": "caf\u00e9",\n  "items": [\n    1,\n    2\n  ]\n}'.encode('utf-8')
+    )
+    assert _json_loads(_json_dumps(obj)) == obj